@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
 import random
+import json
+from demo_data import PRODUCTS, USERS, CALLS, GRAPH
+from upi_records import TransactionStore, random_transaction, random_store, memory_report
+from upi_rules import RuleEngine, compile_rules, FRAUD_RULES, CASHBACK_RULES
+from query_engine import (GraphStore, KeyValueStore, spend_near_flagged, call_time_by_plan,
+                          explain, collect_stats, run, check_memory_bound)
 
 # ================= APP CONFIG =================
 st.set_page_config(page_title="NoSQL Big Data Interactive Demo", layout="wide")
@@ -23,6 +29,7 @@ db_type = st.sidebar.radio(
         "🕸 Graph Database (Neo4j)",
         "🆚 SQL vs Column Store Deep Clarity",
         "💰 Economics Big Data (UPI Example)",
+        "🔗 Cross-Model Analytics (Joins Across Stores)",
         "🖼 Multimedia Storage (Images / Audio / Video)"
     ]
 )
@@ -32,30 +39,7 @@ db_type = st.sidebar.radio(
 # =========================================================
 if db_type.startswith("📄"):
     st.header("📄 Document Database — MongoDB Style")
-    products = [
-        {
-            "product_id": "P101",
-            "name": "iPhone 16",
-            "category": "Mobile",
-            "price": 79999,
-            "features": ["AI Camera", "Fast Chip"],
-            "ratings": [5,4]
-        },
-        {
-            "product_id": "P220",
-            "name": "MacBook Air",
-            "category": "Laptop",
-            "price": 120000,
-            "config": {"ram":"16GB","processor":"M3"}
-        },
-        {
-            "product_id":"P404",
-            "name":"Nike Shoes",
-            "category":"Footwear",
-            "sizes":[7,8,9],
-            "price": 6000
-        }
-    ]
+    products = PRODUCTS
 
     st.subheader("Stored Big Data Style Documents")
     st.json(products)
@@ -94,11 +78,7 @@ if db_type.startswith("📄"):
 elif db_type.startswith("🔑"):
     st.header("🔑 Key–Value Store — Redis Style")
 
-    users = {
-        "user:101":{"name":"Riya","plan":"Premium","status":"Watching"},
-        "user:102":{"name":"Aman","plan":"Basic","status":"Paused"},
-        "user:103":{"name":"Sara","plan":"Premium","status":"Completed"}
-    }
+    users = USERS
 
     st.subheader("Stored Key → Value Data")
     st.json(users)
@@ -130,11 +110,7 @@ elif db_type.startswith("🔑"):
 elif db_type.startswith("📚"):
     st.header("📚 Column Store — Analytics Ready Big Data")
 
-    df = pd.DataFrame({
-        "user_id":[101,101,101,102,102,103,103],
-        "duration(sec)":[180,60,200,90,150,70,300],
-        "city":["Mumbai","Pune","Delhi","Delhi","Mumbai","Chennai","Pune"]
-    })
+    df = pd.DataFrame(CALLS)
 
     st.subheader("Stored Telecom Big Data Sample")
     st.table(df)
@@ -168,16 +144,7 @@ elif db_type.startswith("🕸"):
     st.write("Graph DB stores **nodes + relationships**, not tables.")
 
     # ========= SAMPLE GRAPH DATA (Big Network) =========
-    graph = {
-        "UserA": ["AccX", "UserC"],
-        "AccX": ["AccY"],
-        "AccY": ["UserB"],
-        "UserC": ["UserD", "AccZ"],
-        "AccZ": ["UserB"],
-        "UserD": ["UserE"],
-        "UserB": [],
-        "UserE": []
-    }
+    graph = GRAPH
 
     st.subheader("📌 Stored Graph Network")
     st.code("""
@@ -391,21 +358,41 @@ elif db_type.startswith("💰"):
     st.header("💰 Economics Big Data — UPI India Example")
 
     # ---------- SESSION STATE FOR REAL STORAGE ----------
+    # Column-wise store (int32 amounts, dictionary-coded city/merchant/payer)
     if "transactions" not in st.session_state:
-        st.session_state.transactions = []
+        st.session_state.transactions = TransactionStore()
 
     # ---------- CREATE RANDOM TRANSACTION ----------
-    new_txn = {
-        "txn_id":"UPI" + str(random.randint(10000,99999)),
-        "amount":random.randint(100,5000),
-        "city":random.choice(["Pune","Mumbai","Delhi","Chennai","Bangalore"]),
-        "merchant": random.choice(["Zomato","Swiggy","Amazon","Paytm","Myntra"]),
-        "payer": random.choice(["UserA","UserB","UserC","UserD","UserE"])
-    }
+    new_txn = random_transaction()
 
     st.subheader("👀 Incoming UPI Transaction (like LIVE stream)")
     st.json(new_txn)
 
+    # ---------- RULES AS DATA (editable, no code change needed) ----------
+    with st.expander("⚙ Fraud & Cashback Rules (JSON)"):
+        rule_col1, rule_col2 = st.columns(2)
+        with rule_col1:
+            fraud_text = st.text_area("Fraud Rules", json.dumps(FRAUD_RULES, indent=2), height=300)
+        with rule_col2:
+            cashback_text = st.text_area("Cashback Rules", json.dumps(CASHBACK_RULES, indent=2), height=300)
+        # dry run on a tiny sample so bad rules fail here, not on button click
+        sample = random_store(16, seed=0)
+        sample_categories = {f: sample.categories(f) for f in ("city", "merchant", "payer")}
+        try:
+            fraud_rules = json.loads(fraud_text)
+            cashback_rules = json.loads(cashback_text)
+            for rules in (fraud_rules, cashback_rules):
+                if not isinstance(rules, list):
+                    raise TypeError("rules must be a JSON list of rule objects")
+                compile_rules(rules, sample_categories)
+                RuleEngine(rules).evaluate(sample)
+        except json.JSONDecodeError as e:
+            st.error(f"Invalid rule JSON ({e}) — using default rules")
+            fraud_rules, cashback_rules = FRAUD_RULES, CASHBACK_RULES
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            st.error(f"Invalid rule ({type(e).__name__}: {e}) — using default rules")
+            fraud_rules, cashback_rules = FRAUD_RULES, CASHBACK_RULES
+
     col1,col2,col3,col4 = st.columns(4)
 
     # ---------- STORE ----------
@@ -420,12 +407,12 @@ elif db_type.startswith("💰"):
             if len(st.session_state.transactions)==0:
                 st.warning("Store some transactions first")
             else:
-                df = pd.DataFrame(st.session_state.transactions)
+                df = st.session_state.transactions.to_frame()
                 st.write("### City Wise Total Spend")
-                st.bar_chart(df.groupby("city")["amount"].sum())
+                st.bar_chart(df.groupby("city", observed=True)["amount"].sum())
 
                 st.write("### Merchant Popularity")
-                st.bar_chart(df.groupby("merchant")["amount"].count())
+                st.bar_chart(df.groupby("merchant", observed=True)["amount"].count())
 
     # ---------- CASHBACK ----------
     with col3:
@@ -434,10 +421,12 @@ elif db_type.startswith("💰"):
                 st.warning("Store some transactions first")
             else:
                 last = st.session_state.transactions[-1]
-                if last["amount"] > 2000:
-                    st.success(f"Cashback Approved 🎉 High Value Transaction from {last['merchant']}")
+                result = RuleEngine(cashback_rules).evaluate_latest(st.session_state.transactions)
+                if result.flags[-1]:
+                    st.success(f"Cashback Approved 🎉 {', '.join(result.reasons(-1))} from {last.merchant}")
                 else:
-                    st.info("No Cashback — Small Value Transaction")
+                    names = ", ".join(r["name"] for r in cashback_rules)
+                    st.info(f"No Cashback — no cashback rule matched this transaction ({names})")
 
     # ---------- FRAUD DETECTION ----------
     with col4:
@@ -445,31 +434,12 @@ elif db_type.startswith("💰"):
             if len(st.session_state.transactions) < 3:
                 st.warning("Need more transactions to analyze fraud")
             else:
-                df = pd.DataFrame(st.session_state.transactions)
-
-                suspicious = False
-                message = ""
-
-                # Rule 1 – Same payer too many quick transactions
-                payer_counts = df["payer"].value_counts()
-                if payer_counts.max() >= 3:
-                    suspicious = True
-                    message += "Same user making too many payments quickly.\n"
-
-                # Rule 2 – Same merchant repeatedly
-                merchant_counts = df["merchant"].value_counts()
-                if merchant_counts.max() >= 3:
-                    suspicious = True
-                    message += "Suspicious transactions to same merchant repeatedly.\n"
-
-                # Rule 3 – Too many high value payments
-                high_value = len(df[df["amount"]>3000])
-                if high_value >= 3:
-                    suspicious = True
-                    message += "Multiple high value transactions detected.\n"
-
-                if suspicious:
-                    st.error("⚠ Fraud Pattern Detected\n" + message)
+                # every rule checked on every stored transaction in one batched pass
+                result = RuleEngine(fraud_rules).evaluate(st.session_state.transactions)
+
+                if result.flags.any():
+                    st.error("⚠ Fraud Pattern Detected\n" + "\n".join(result.fired_reasons()))
+                    st.write(f"{int(result.flags.sum())} of {len(result)} transactions flagged")
                 else:
                     st.success("No suspicious behavior detected ✔")
 
@@ -478,7 +448,91 @@ elif db_type.startswith("💰"):
     if len(st.session_state.transactions)==0:
         st.info("No transactions stored yet — press Store Transaction")
     else:
-        st.table(pd.DataFrame(st.session_state.transactions))
+        st.table(st.session_state.transactions.to_frame())
+
+    # ---------- MEMORY FOOTPRINT ----------
+    st.subheader("🧮 Memory per Transaction — Dicts vs Compact Records")
+    if st.button("📏 Run Memory Report (100k transactions)"):
+        report = memory_report(100000)
+        st.table(report)
+        st.caption("Column store keeps int32 amounts + tiny codes for city / merchant / payer instead of a dict per row")
+
+    # ---------- BACKFILL SCORING ----------
+    st.subheader("⚡ Backfill Scoring — Fraud Rules over 1 Million Transactions")
+    if st.button("🏎 Score 1M Synthetic Transactions"):
+        backfill = random_store(1_000_000)
+        result = RuleEngine(fraud_rules).evaluate(backfill)
+        stats = result.throughput()
+        st.success(f"Scored {stats['transactions']:,} transactions × {stats['rules']} rules in {stats['seconds']} s "
+                   f"→ {stats['rules_evaluated_per_sec']:,.0f} rules evaluated / sec")
+        st.table(result.summary())
+
+
+# =========================================================
+# CROSS-MODEL ANALYTICS
+# =========================================================
+elif db_type.startswith("🔗"):
+    st.header("🔗 Cross-Model Analytics — Joining Graph, Key-Value & Column Stores")
+    st.write("UPI payers **UserA..UserE** are the SAME entities as the nodes in the 🕸 fraud graph. "
+             "A small query engine joins the stores directly.")
+
+    max_rows = st.number_input("Max rows held in memory per hash table / sort buffer (beyond → spill to disk)",
+                               min_value=2, value=100000, step=1000)
+
+    # ---------- SPEND NEAR FLAGGED NODES ----------
+    st.subheader("💸 Total Spend by Payers within N Hops of a Flagged Node")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        flagged = st.multiselect("Flagged nodes", list(GRAPH.keys()), default=["UserB"])
+    with col2:
+        hops = st.slider("Max hops", 1, 5, 3)
+
+    use_stored = "transactions" in st.session_state and len(st.session_state.transactions) > 0
+    if use_stored:
+        st.caption(f"Using your {len(st.session_state.transactions)} stored UPI transactions")
+    else:
+        st.caption("No stored UPI transactions yet — using 200,000 synthetic ones")
+
+    if st.button("▶ Run Graph ⋈ Transactions Query"):
+        # synthetic data is only built when the query actually runs
+        txn_store = st.session_state.transactions if use_stored else random_store(200000, seed=7)
+        plan = spend_near_flagged(GraphStore(GRAPH), txn_store, flagged, hops, max_rows)
+        st.code(explain(plan))
+        result = run(plan)
+        if result.empty:
+            st.info("No payers found near the flagged nodes")
+        else:
+            st.table(result)
+            st.bar_chart(result.set_index("payer")["total_spend"])
+        st.write("Spill stats:", collect_stats(plan) or "everything fit in memory ✔")
+
+    # ---------- CALL TIME BY PLAN ----------
+    st.subheader("📞 Call Time by Subscription Plan (Key-Value Users ⋈ Column Store Calls)")
+    if st.button("▶ Run Users ⋈ Calls Query"):
+        users_store = KeyValueStore(USERS, key_field="user_id", key_prefix="user:", key_type=int)
+        plan = call_time_by_plan(users_store, pd.DataFrame(CALLS), max_rows)
+        st.code(explain(plan))
+        st.table(run(plan))
+        st.write("Spill stats:", collect_stats(plan) or "everything fit in memory ✔")
+
+    # ---------- MEMORY BOUND CHECK ----------
+    st.subheader("🧪 Spill Check — Does Memory Stay Under the Limit?")
+    if st.button("▶ Run Spill Check (50k keys, limit 500 rows)"):
+        try:
+            report = check_memory_bound(500, 50000)
+            st.success("Peak rows in memory stayed ≤ 500 for every operator ✔")
+            st.table(pd.DataFrame(report).T)
+        except AssertionError as e:
+            st.error(f"Memory limit exceeded: {e}")
+
+    st.info("""
+How the engine works:
+✔ Filters are pushed INTO each store (e.g. hops ≤ N limits the graph traversal itself)
+✔ Only needed columns are read from the column store
+✔ Hash join / sort-merge join connect the stores
+✔ Big hash tables and sorts spill to disk instead of running out of RAM
+""")
 
 
 # =========================================================
@@ -0,0 +1,56 @@
+# ================= SHARED DEMO DATA =================
+# The sample data each page shows. Kept in one place so the same entities
+# (e.g. UserA..UserE as UPI payers and as fraud graph nodes) can be joined
+# across stores.
+
+# 📄 Document DB
+PRODUCTS = [
+    {
+        "product_id": "P101",
+        "name": "iPhone 16",
+        "category": "Mobile",
+        "price": 79999,
+        "features": ["AI Camera", "Fast Chip"],
+        "ratings": [5,4]
+    },
+    {
+        "product_id": "P220",
+        "name": "MacBook Air",
+        "category": "Laptop",
+        "price": 120000,
+        "config": {"ram":"16GB","processor":"M3"}
+    },
+    {
+        "product_id":"P404",
+        "name":"Nike Shoes",
+        "category":"Footwear",
+        "sizes":[7,8,9],
+        "price": 6000
+    }
+]
+
+# 🔑 Key–Value Store
+USERS = {
+    "user:101":{"name":"Riya","plan":"Premium","status":"Watching"},
+    "user:102":{"name":"Aman","plan":"Basic","status":"Paused"},
+    "user:103":{"name":"Sara","plan":"Premium","status":"Completed"}
+}
+
+# 📚 Column Store (telecom calls)
+CALLS = {
+    "user_id":[101,101,101,102,102,103,103],
+    "duration(sec)":[180,60,200,90,150,70,300],
+    "city":["Mumbai","Pune","Delhi","Delhi","Mumbai","Chennai","Pune"]
+}
+
+# 🕸 Graph Database (money flow)
+GRAPH = {
+    "UserA": ["AccX", "UserC"],
+    "AccX": ["AccY"],
+    "AccY": ["UserB"],
+    "UserC": ["UserD", "AccZ"],
+    "AccZ": ["UserB"],
+    "UserD": ["UserE"],
+    "UserB": [],
+    "UserE": []
+}
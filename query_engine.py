@@ -0,0 +1,791 @@
+import heapq
+import pickle
+import tempfile
+from collections import deque
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from upi_records import TransactionStore, TXN_PREFIX, parse_txn_id
+from upi_rules import OPS
+
+# ================= CROSS-STORE QUERY ENGINE =================
+# Small pull-based (iterator) engine over the four demo stores:
+#   DocumentStore   -> list of dicts            (📄 MongoDB style)
+#   KeyValueStore   -> {"user:101": {...}}      (🔑 Redis style)
+#   ColumnStore     -> DataFrame / TransactionStore (📚 Cassandra style)
+#   GraphStore      -> adjacency dict           (🕸 Neo4j style)
+#
+# Every store answers scan(columns, predicates), so the optimizer can push
+# filters (predicate pushdown) and the needed column list (projection
+# pruning) down into the store. Rows travel between operators as dicts.
+#
+# Predicates use the same shape as rule "where" clauses in upi_rules:
+#   {"field": "amount", "op": ">", "value": 3000}     (op also "in")
+#
+# Hash tables (joins, aggregates) and sort buffers hold at most
+# `max_rows_in_memory` rows; beyond that they spill to temp files on disk.
+
+DEFAULT_MAX_ROWS = 100000
+SPILL_PARTITIONS = 16
+MAX_SPILL_DEPTH = 3
+SCAN_CHUNK_ROWS = 65536   # column store decodes this many rows to Python at a time
+
+
+def row_matches(row, pred):
+    """Row-at-a-time predicate check (missing / None values never match)"""
+    v = row.get(pred["field"])
+    if v is None:
+        return False
+    if pred["op"] == "in":
+        return v in pred["value"]
+    return OPS[pred["op"]](v, pred["value"])
+
+
+# ---------- SPILL FILES ----------
+class _SpillFile:
+    """Append-only temp file of pickled rows, read back as a stream"""
+
+    def __init__(self, spill_dir=None):
+        self.file = tempfile.TemporaryFile(dir=spill_dir)
+        self.count = 0
+
+    def write(self, row):
+        pickle.dump(row, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += 1
+
+    def read(self):
+        self.file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self.file)
+            except EOFError:
+                return
+
+    def close(self):
+        self.file.close()
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _bucket(key, depth):
+    """Spill partition of `key` at recursion `depth`.
+
+    hash(key) is run through splitmix64 seeded with the depth, so the keys of
+    one partition spread over all partitions again at the next level.
+    """
+    z = (hash(key) + (depth + 1) * 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return (z ^ (z >> 31)) % SPILL_PARTITIONS
+
+
+def _note_peak(stats, n):
+    """Track the most rows an operator held in memory at once"""
+    if n > stats.get("peak_rows_in_memory", 0):
+        stats["peak_rows_in_memory"] = n
+
+
+def _partition(rows, key_fn, depth, spill_dir, stats):
+    """Hash-partition rows into SPILL_PARTITIONS files"""
+    parts = [_SpillFile(spill_dir) for _ in range(SPILL_PARTITIONS)]
+    for row in rows:
+        parts[_bucket(key_fn(row), depth)].write(row)
+    stats["spilled_rows"] = stats.get("spilled_rows", 0) + sum(p.count for p in parts)
+    stats["spill_partitions"] = stats.get("spill_partitions", 0) + SPILL_PARTITIONS
+    return parts
+
+
+# =========================================================
+# STORES
+# =========================================================
+class DocumentStore:
+    """List of JSON-like documents; fields differ per document"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.fields = tuple(dict.fromkeys(k for d in docs for k in d))
+
+    def scan(self, columns=None, predicates=()):
+        columns = columns or self.fields
+        for doc in self.docs:
+            if all(row_matches(doc, p) for p in predicates):
+                yield {c: doc.get(c) for c in columns}
+
+
+class KeyValueStore:
+    """Redis style "prefix:id" -> value dict. The id is exposed as `key_field`.
+
+    == / in predicates on the key become direct GETs instead of a full scan.
+    """
+
+    def __init__(self, data, key_field="key", key_prefix="", key_type=str):
+        self.data = data
+        self.key_field = key_field
+        self.key_prefix = key_prefix
+        self.key_type = key_type
+        value_fields = dict.fromkeys(k for v in data.values() for k in v)
+        self.fields = (key_field,) + tuple(value_fields)
+
+    def _row(self, raw_key):
+        row = {self.key_field: self.key_type(raw_key[len(self.key_prefix):])}
+        row.update(self.data[raw_key])
+        return row
+
+    def scan(self, columns=None, predicates=()):
+        columns = columns or self.fields
+        point = [p for p in predicates if p["field"] == self.key_field and p["op"] in ("==", "in")]
+        if point:
+            p = point[0]
+            wanted = dict.fromkeys(p["value"] if p["op"] == "in" else [p["value"]])
+            raw_keys = [self.key_prefix + str(k) for k in wanted if self.key_prefix + str(k) in self.data]
+        else:
+            raw_keys = self.data.keys()
+        for raw_key in raw_keys:
+            row = self._row(raw_key)
+            if all(row_matches(row, p) for p in predicates):
+                yield {c: row.get(c) for c in columns}
+
+
+class ColumnStore:
+    """Columnar table (DataFrame or TransactionStore).
+
+    Only the projected + filtered columns are touched; filters run as one
+    vectorized mask that gives the same answer as row_matches on decoded rows:
+    coded fields become a set of matching codes, txn_id values lose their
+    "UPI" prefix. Ordering on txn_id is refused (can_push) and stays in a Filter.
+    Matching rows are decoded to Python in SCAN_CHUNK_ROWS blocks.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        if isinstance(table, TransactionStore):
+            self.fields = ("txn_id", "amount", "city", "merchant", "payer")
+        else:
+            self.fields = tuple(table.columns)
+
+    def _array(self, field):
+        if isinstance(self.table, TransactionStore):
+            return self.table.column(field)
+        return self.table[field].to_numpy()
+
+    def can_push(self, pred):
+        """txn_id is stored as an int, so string ordering cannot be pushed"""
+        txn_ids = isinstance(self.table, TransactionStore) and pred["field"] == "txn_id"
+        return not (txn_ids and pred["op"] not in ("==", "!=", "in"))
+
+    def _mask(self, pred, values):
+        field, op, value = pred["field"], pred["op"], pred["value"]
+        if isinstance(self.table, TransactionStore):
+            if field in ("city", "merchant", "payer"):
+                cats = self.table.categories(field)
+                codes = [i for i, c in enumerate(cats) if row_matches({field: c}, pred)]
+                return np.isin(values, codes)
+            if field == "txn_id":
+                if not self.can_push(pred):
+                    raise ValueError(f"Cannot evaluate '{op}' on txn_id inside the column store")
+                ids = value if op == "in" else [value]
+                parsed = []
+                for v in ids:
+                    try:
+                        parsed.append(parse_txn_id(v))
+                    except ValueError:
+                        pass      # not a storable id -> equals no stored row
+                hit = np.isin(values, parsed)
+                return ~hit if op == "!=" else hit
+
+        if op == "in":
+            return np.isin(values, list(value))
+        if values.dtype == object:
+            # None never matches, like row_matches
+            present = np.not_equal(values, None)
+            hit = np.zeros(len(values), dtype=bool)
+            hit[present] = OPS[op](values[present], value)
+            return hit
+        return np.asarray(OPS[op](values, value), dtype=bool)
+
+    def _decode(self, field, values):
+        if isinstance(self.table, TransactionStore):
+            if field in ("city", "merchant", "payer"):
+                cats = self.table.categories(field)
+                return [cats[c] for c in values.tolist()]
+            if field == "txn_id":
+                return [TXN_PREFIX + str(v) for v in values.tolist()]
+        return values.tolist()
+
+    def scan(self, columns=None, predicates=()):
+        columns = columns or self.fields
+        pred_fields = [p["field"] for p in predicates]
+        arrays = {f: self._array(f) for f in dict.fromkeys(list(columns) + pred_fields)}
+        n = len(self._array(columns[0])) if columns else 0
+
+        mask = np.ones(n, dtype=bool)
+        for p in predicates:
+            mask &= self._mask(p, arrays[p["field"]])
+        idx = np.flatnonzero(mask)
+
+        for start in range(0, len(idx), SCAN_CHUNK_ROWS):
+            block = idx[start:start + SCAN_CHUNK_ROWS]
+            out = [self._decode(c, arrays[c][block]) for c in columns]
+            for values in zip(*out):
+                yield dict(zip(columns, values))
+
+
+class GraphStore:
+    """Directed adjacency dict; scanned as edges {"src", "dst"}"""
+
+    fields = ("src", "dst")
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def scan(self, columns=None, predicates=()):
+        columns = columns or self.fields
+        for src, targets in self.graph.items():
+            for dst in targets:
+                row = {"src": src, "dst": dst}
+                if all(row_matches(row, p) for p in predicates):
+                    yield {c: row[c] for c in columns}
+
+    def neighbourhood(self, seeds, direction="both"):
+        """Nodes reachable from `seeds`, scanned as {"node", "hops"}"""
+        return _Neighbourhood(self.graph, seeds, direction)
+
+
+class _Neighbourhood:
+    """BFS from seed nodes. A hops <= / < predicate is pushed into the BFS depth"""
+
+    fields = ("node", "hops")
+
+    def __init__(self, graph, seeds, direction):
+        self.seeds = list(seeds)
+        self.adjacency = {n: set() for n in graph}
+        for src, targets in graph.items():
+            for dst in targets:
+                if direction in ("out", "both"):
+                    self.adjacency.setdefault(src, set()).add(dst)
+                if direction in ("in", "both"):
+                    self.adjacency.setdefault(dst, set()).add(src)
+
+    def scan(self, columns=None, predicates=()):
+        columns = columns or self.fields
+        max_hops = None
+        for p in predicates:
+            if p["field"] == "hops" and p["op"] in ("<=", "<"):
+                bound = p["value"] if p["op"] == "<=" else p["value"] - 1
+                max_hops = bound if max_hops is None else min(max_hops, bound)
+
+        dist = {s: 0 for s in self.seeds if s in self.adjacency}
+        queue = deque(dist)
+        while queue:
+            node = queue.popleft()
+            if max_hops is not None and dist[node] >= max_hops:
+                continue
+            for n in sorted(self.adjacency[node]):
+                if n not in dist:
+                    dist[n] = dist[node] + 1
+                    queue.append(n)
+
+        for node, hops in dist.items():
+            row = {"node": node, "hops": hops}
+            if all(row_matches(row, p) for p in predicates):
+                yield {c: row[c] for c in columns}
+
+
+# =========================================================
+# PLAN OPERATORS
+# =========================================================
+class Scan:
+    def __init__(self, store, columns=None, predicates=(), name=None):
+        self.store = store
+        self.columns = list(columns) if columns else None
+        self.predicates = list(predicates)
+        self.name = name or type(store).__name__.lstrip("_")
+        self.stats = {}
+
+    def output_columns(self):
+        return list(self.columns or self.store.fields)
+
+    def children(self):
+        return []
+
+    def rows(self):
+        return self.store.scan(self.columns, self.predicates)
+
+    def describe(self):
+        preds = ", ".join(f"{p['field']} {p['op']} {p['value']}" for p in self.predicates)
+        return f"Scan {self.name} columns=[{', '.join(self.output_columns())}]" + (f" where {preds}" if preds else "")
+
+
+class Filter:
+    def __init__(self, child, predicates):
+        self.child = child
+        self.predicates = list(predicates)
+        self.stats = {}
+
+    def output_columns(self):
+        return self.child.output_columns()
+
+    def children(self):
+        return [self.child]
+
+    def rows(self):
+        for row in self.child.rows():
+            if all(row_matches(row, p) for p in self.predicates):
+                yield row
+
+    def describe(self):
+        return "Filter " + ", ".join(f"{p['field']} {p['op']} {p['value']}" for p in self.predicates)
+
+
+class Project:
+    def __init__(self, child, columns):
+        self.child = child
+        self.columns = list(columns)
+        self.stats = {}
+
+    def output_columns(self):
+        return list(self.columns)
+
+    def children(self):
+        return [self.child]
+
+    def rows(self):
+        for row in self.child.rows():
+            yield {c: row.get(c) for c in self.columns}
+
+    def describe(self):
+        return f"Project [{', '.join(self.columns)}]"
+
+
+class HashJoin:
+    """Inner equi-join. Builds a hash table on `left`, probes with `right`.
+
+    If the build side grows past max_rows_in_memory both inputs are
+    hash-partitioned to disk and joined partition by partition (Grace hash join).
+    """
+
+    def __init__(self, left, right, left_key, right_key, max_rows_in_memory=DEFAULT_MAX_ROWS, spill_dir=None):
+        self.left, self.right = left, right
+        self.left_key, self.right_key = left_key, right_key
+        self.max_rows = max_rows_in_memory
+        self.spill_dir = spill_dir
+        self.stats = {}
+
+    def output_columns(self):
+        return list(dict.fromkeys(self.left.output_columns() + self.right.output_columns()))
+
+    def children(self):
+        return [self.left, self.right]
+
+    def _probe(self, table, probe_rows):
+        for row in probe_rows:
+            for match in table.get(row.get(self.right_key), ()):
+                yield {**match, **row}
+
+    def _join(self, build_rows, probe_rows, depth):
+        lk = self.left_key
+        table, n = {}, 0
+        build_rows = iter(build_rows)
+        for row in build_rows:
+            key = row.get(lk)
+            if key is None:
+                continue
+            if n >= self.max_rows and depth < MAX_SPILL_DEPTH:
+                # hash table full -> Grace partitioning on disk
+                pending = chain((r for rows in table.values() for r in rows), [row], build_rows)
+                left_parts = _partition((r for r in pending if r.get(lk) is not None),
+                                        lambda r: r[lk], depth, self.spill_dir, self.stats)
+                right_parts = _partition((r for r in probe_rows if r.get(self.right_key) is not None),
+                                         lambda r: r[self.right_key], depth, self.spill_dir, self.stats)
+                for lp, rp in zip(left_parts, right_parts):
+                    if lp.count and rp.count:
+                        yield from self._join(lp.read(), rp.read(), depth + 1)
+                    lp.close()
+                    rp.close()
+                return
+            table.setdefault(key, []).append(row)
+            n += 1
+            _note_peak(self.stats, n)
+        yield from self._probe(table, probe_rows)
+
+    def rows(self):
+        return self._join(self.left.rows(), self.right.rows(), 0)
+
+    def describe(self):
+        return f"HashJoin {self.left_key} = {self.right_key} (max {self.max_rows:,} rows in memory)"
+
+
+def _sort_key(keys, reverse=False):
+    # None sorts last in both directions (the null flag is flipped for reverse
+    # sorts); tuples keep multi-column keys comparable
+    if reverse:
+        return lambda row: tuple((row.get(k) is not None, row.get(k)) for k in keys)
+    return lambda row: tuple((row.get(k) is None, row.get(k)) for k in keys)
+
+
+def _external_sort(rows, keys, max_rows, spill_dir, stats, reverse=False):
+    """Sort rows; runs longer than max_rows are sorted, spilled, then k-way merged"""
+    key_fn = _sort_key(keys, reverse)
+    runs, buffer = [], []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= max_rows:
+            buffer.sort(key=key_fn, reverse=reverse)
+            run = _SpillFile(spill_dir)
+            for r in buffer:
+                run.write(r)
+            runs.append(run)
+            stats["spilled_rows"] = stats.get("spilled_rows", 0) + len(buffer)
+            stats["sort_runs"] = stats.get("sort_runs", 0) + 1
+            buffer = []
+    buffer.sort(key=key_fn, reverse=reverse)
+    if not runs:
+        yield from buffer
+        return
+    yield from heapq.merge(*(r.read() for r in runs), buffer, key=key_fn, reverse=reverse)
+    for r in runs:
+        r.close()
+
+
+class SortMergeJoin:
+    """Inner equi-join: external-sort both inputs on the key, then merge"""
+
+    def __init__(self, left, right, left_key, right_key, max_rows_in_memory=DEFAULT_MAX_ROWS, spill_dir=None):
+        self.left, self.right = left, right
+        self.left_key, self.right_key = left_key, right_key
+        self.max_rows = max_rows_in_memory
+        self.spill_dir = spill_dir
+        self.stats = {}
+
+    def output_columns(self):
+        return list(dict.fromkeys(self.left.output_columns() + self.right.output_columns()))
+
+    def children(self):
+        return [self.left, self.right]
+
+    def _sorted(self, child, key):
+        rows = (r for r in child.rows() if r.get(key) is not None)
+        return _external_sort(rows, [key], self.max_rows, self.spill_dir, self.stats)
+
+    def rows(self):
+        lk, rk = self.left_key, self.right_key
+        left, right = self._sorted(self.left, lk), self._sorted(self.right, rk)
+        l, r = next(left, None), next(right, None)
+        while l is not None and r is not None:
+            if l[lk] < r[rk]:
+                l = next(left, None)
+            elif l[lk] > r[rk]:
+                r = next(right, None)
+            else:
+                # buffer the run of equal keys on the right, replay it for each left row
+                key, group = r[rk], []
+                while r is not None and r[rk] == key:
+                    group.append(r)
+                    r = next(right, None)
+                while l is not None and l[lk] == key:
+                    for g in group:
+                        yield {**l, **g}
+                    l = next(left, None)
+
+    def describe(self):
+        return f"SortMergeJoin {self.left_key} = {self.right_key} (max {self.max_rows:,} rows in memory)"
+
+
+# ---------- AGGREGATES ----------
+# name -> (init(value), update(state, value), merge(a, b), final(state), empty result)
+# None values are skipped like SQL NULLs; a state stays None until the first
+# non-null value, and an all-null group gives the "empty result".
+AGGREGATES = {
+    "sum": (lambda v: v, lambda s, v: s + v, lambda a, b: a + b, lambda s: s, None),
+    "count": (lambda v: 1, lambda s, v: s + 1, lambda a, b: a + b, lambda s: s, 0),
+    "min": (lambda v: v, min, min, lambda s: s, None),
+    "max": (lambda v: v, max, max, lambda s: s, None),
+    "avg": (lambda v: (v, 1), lambda s, v: (s[0] + v, s[1] + 1),
+            lambda a, b: (a[0] + b[0], a[1] + b[1]), lambda s: s[0] / s[1], None),
+}
+
+
+class Aggregate:
+    """Hash group-by. aggs = {"output": ("sum", "amount"), ...}
+
+    Partial aggregates are flushed to hash partitions on disk whenever more than
+    max_rows_in_memory groups are held, then merged partition by partition;
+    a partition that is still too big is re-partitioned (like HashJoin).
+    """
+
+    def __init__(self, child, group_by, aggs, max_rows_in_memory=DEFAULT_MAX_ROWS, spill_dir=None):
+        self.child = child
+        self.group_by = list(group_by)
+        self.aggs = dict(aggs)
+        self.max_rows = max_rows_in_memory
+        self.spill_dir = spill_dir
+        self.stats = {}
+
+    def output_columns(self):
+        return self.group_by + list(self.aggs)
+
+    def input_columns(self):
+        return list(dict.fromkeys(self.group_by + [col for _, col in self.aggs.values()]))
+
+    def children(self):
+        return [self.child]
+
+    def _accumulate(self, groups, key, row):
+        states = groups.get(key)
+        if states is None:
+            states = groups[key] = [None] * len(self.aggs)
+        for i, (fn, col) in enumerate(self.aggs.values()):
+            v = row.get(col)
+            if v is None:
+                continue
+            init, update = AGGREGATES[fn][:2]
+            states[i] = init(v) if states[i] is None else update(states[i], v)
+
+    def _merge(self, groups, key, partial):
+        states = groups.get(key)
+        if states is None:
+            groups[key] = partial
+            return
+        for i, (fn, _) in enumerate(self.aggs.values()):
+            if states[i] is None:
+                states[i] = partial[i]
+            elif partial[i] is not None:
+                states[i] = AGGREGATES[fn][2](states[i], partial[i])
+
+    def _emit(self, groups):
+        finals = [AGGREGATES[fn][3:] for fn, _ in self.aggs.values()]
+        for key, states in groups.items():
+            row = dict(zip(self.group_by, key))
+            row.update(zip(self.aggs, (empty if s is None else f(s) for (f, empty), s in zip(finals, states))))
+            yield row
+
+    def _spill(self, parts, groups, depth):
+        for key, states in groups.items():
+            parts[_bucket(key, depth)].write((key, states))
+        self.stats["spilled_rows"] = self.stats.get("spilled_rows", 0) + len(groups)
+
+    def _merge_partitions(self, entries, depth):
+        """Merge (key, partial states) entries; re-partition if the groups outgrow memory"""
+        merged = {}
+        entries = iter(entries)
+        for key, states in entries:
+            if key not in merged and len(merged) >= self.max_rows and depth < MAX_SPILL_DEPTH:
+                pending = chain(merged.items(), [(key, states)], entries)
+                parts = _partition(pending, lambda e: e[0], depth, self.spill_dir, self.stats)
+                for part in parts:
+                    if part.count:
+                        yield from self._merge_partitions(part.read(), depth + 1)
+                    part.close()
+                return
+            self._merge(merged, key, states)
+            _note_peak(self.stats, len(merged))
+        yield from self._emit(merged)
+
+    def rows(self):
+        groups, parts = {}, None
+        for row in self.child.rows():
+            key = tuple(row.get(g) for g in self.group_by)
+            if key not in groups and len(groups) >= self.max_rows:
+                # table full -> flush partial aggregates to disk, keep going
+                if parts is None:
+                    parts = [_SpillFile(self.spill_dir) for _ in range(SPILL_PARTITIONS)]
+                    self.stats["spill_partitions"] = self.stats.get("spill_partitions", 0) + SPILL_PARTITIONS
+                self._spill(parts, groups, 0)
+                groups = {}
+            self._accumulate(groups, key, row)
+            _note_peak(self.stats, len(groups))
+
+        if parts is None:
+            yield from self._emit(groups)
+            return
+        self._spill(parts, groups, 0)
+        for part in parts:
+            if part.count:
+                yield from self._merge_partitions(part.read(), 1)
+            part.close()
+
+    def describe(self):
+        aggs = ", ".join(f"{out}={fn}({col})" for out, (fn, col) in self.aggs.items())
+        return f"Aggregate by [{', '.join(self.group_by)}] {aggs}"
+
+
+class Sort:
+    def __init__(self, child, keys, descending=False, max_rows_in_memory=DEFAULT_MAX_ROWS, spill_dir=None):
+        self.child = child
+        self.keys = list(keys)
+        self.descending = descending
+        self.max_rows = max_rows_in_memory
+        self.spill_dir = spill_dir
+        self.stats = {}
+
+    def output_columns(self):
+        return self.child.output_columns()
+
+    def children(self):
+        return [self.child]
+
+    def rows(self):
+        return _external_sort(self.child.rows(), self.keys, self.max_rows, self.spill_dir,
+                              self.stats, reverse=self.descending)
+
+    def describe(self):
+        return f"Sort by [{', '.join(self.keys)}]" + (" desc" if self.descending else "")
+
+
+# =========================================================
+# OPTIMIZER — predicate pushdown + projection pruning
+# =========================================================
+def optimize(plan, required=None, pushed=()):
+    """Rewrite the plan so filters and column lists reach the scans.
+
+    required -> columns the parent still needs (None = all)
+    pushed   -> predicates handed down by a parent Filter
+    """
+    pushed = list(pushed)
+
+    if isinstance(plan, Filter):
+        return optimize(plan.child, required, pushed + plan.predicates)
+
+    if isinstance(plan, Scan):
+        fields = set(plan.store.fields)
+        can_push = getattr(plan.store, "can_push", lambda p: True)
+        mine = [p for p in pushed if p["field"] in fields and can_push(p)]
+        rest = [p for p in pushed if p not in mine]
+        columns = plan.output_columns()
+        if required is not None:
+            keep = set(required) | {p["field"] for p in rest}
+            columns = [c for c in columns if c in keep]
+            if not columns:
+                columns = plan.output_columns()[:1]
+        node = Scan(plan.store, columns, plan.predicates + mine, plan.name)
+        return Filter(node, rest) if rest else node
+
+    if isinstance(plan, Project):
+        # predicates on columns the Project drops must stay above it
+        below = [p for p in pushed if p["field"] in plan.columns]
+        above = [p for p in pushed if p not in below]
+        need = [c for c in plan.columns if required is None or c in required]
+        child = optimize(plan.child, set(need) | {p["field"] for p in below}, below)
+        node = Project(child, need)
+        return Filter(node, above) if above else node
+
+    if isinstance(plan, (HashJoin, SortMergeJoin)):
+        left_cols = set(plan.left.output_columns())
+        right_cols = set(plan.right.output_columns())
+        lk, rk = plan.left_key, plan.right_key
+        left_preds, right_preds, rest = [], [], []
+        for p in pushed:
+            f = p["field"]
+            if f == rk or (f == lk and f not in right_cols):
+                # join key: both sides hold the same value, filter both
+                left_preds.append(dict(p, field=lk))
+                right_preds.append(dict(p, field=rk))
+            elif f in left_cols and f not in right_cols:
+                left_preds.append(p)
+            elif f in right_cols and f not in left_cols:
+                right_preds.append(p)
+            else:
+                # in both sides (output keeps the right value) or in neither
+                rest.append(p)
+        need = None if required is None else set(required) | {p["field"] for p in rest}
+        left = optimize(plan.left, None if need is None else (need & left_cols) | {plan.left_key}, left_preds)
+        right = optimize(plan.right, None if need is None else (need & right_cols) | {plan.right_key}, right_preds)
+        node = type(plan)(left, right, plan.left_key, plan.right_key, plan.max_rows, plan.spill_dir)
+        return Filter(node, rest) if rest else node
+
+    if isinstance(plan, Aggregate):
+        # only predicates on group keys may pass below a group-by
+        below = [p for p in pushed if p["field"] in plan.group_by]
+        above = [p for p in pushed if p not in below]
+        child = optimize(plan.child, set(plan.input_columns()), below)
+        node = Aggregate(child, plan.group_by, plan.aggs, plan.max_rows, plan.spill_dir)
+        return Filter(node, above) if above else node
+
+    if isinstance(plan, Sort):
+        need = None if required is None else set(required) | set(plan.keys)
+        child = optimize(plan.child, need, pushed)
+        return Sort(child, plan.keys, plan.descending, plan.max_rows, plan.spill_dir)
+
+    raise TypeError(f"Cannot optimize {type(plan).__name__}")
+
+
+def explain(plan, indent=0):
+    """Plan tree as text (one operator per line)"""
+    line = "  " * indent + ("└─ " if indent else "") + plan.describe()
+    return "\n".join([line] + [explain(c, indent + 1) for c in plan.children()])
+
+
+def collect_stats(plan):
+    """Spill counters of every operator in the plan"""
+    stats = dict(plan.stats)
+    for child in plan.children():
+        for k, v in collect_stats(child).items():
+            stats[k] = stats.get(k, 0) + v
+    return stats
+
+
+def run(plan):
+    """Execute a plan into a DataFrame"""
+    columns = plan.output_columns()
+    return pd.DataFrame(list(plan.rows()), columns=columns)
+
+
+def check_memory_bound(max_rows_in_memory=500, n=50000):
+    """Regression check: spilling joins / aggregates never hold more than the limit.
+
+    Runs a HashJoin on n int keys and Aggregates over n int and n str groups,
+    and raises AssertionError if any peak exceeds max_rows_in_memory.
+    """
+    ints = DocumentStore([{"k": i, "v": i % 7} for i in range(n)])
+    strs = DocumentStore([{"k": f"key{i}", "v": 1} for i in range(n)])
+    plans = {
+        "hash_join_int": HashJoin(Scan(ints), Scan(ints), "k", "k", max_rows_in_memory),
+        "aggregate_int": Aggregate(Scan(ints), ["k"], {"s": ("sum", "v")}, max_rows_in_memory),
+        "aggregate_str": Aggregate(Scan(strs), ["k"], {"s": ("sum", "v")}, max_rows_in_memory),
+    }
+    report = {}
+    for name, plan in plans.items():
+        out = sum(1 for _ in plan.rows())
+        assert out == n, f"{name}: {out} rows out, expected {n}"
+        peak = plan.stats.get("peak_rows_in_memory", 0)
+        assert peak <= max_rows_in_memory, f"{name}: held {peak} rows, limit {max_rows_in_memory}"
+        report[name] = dict(plan.stats)
+    return report
+
+
+# =========================================================
+# READY-MADE CROSS-MODEL QUERIES
+# =========================================================
+def spend_near_flagged(graph_store, txn_store, flagged, hops=3, max_rows_in_memory=DEFAULT_MAX_ROWS):
+    """Total UPI spend by payers within `hops` graph hops of the flagged nodes"""
+    near = Scan(graph_store.neighbourhood(flagged), name="Graph neighbourhood")
+    txns = Scan(ColumnStore(txn_store), name="UPI transactions")
+    plan = Sort(
+        Aggregate(
+            Filter(
+                HashJoin(near, txns, "node", "payer", max_rows_in_memory),
+                [{"field": "hops", "op": "<=", "value": hops}]
+            ),
+            ["payer", "hops"],
+            {"total_spend": ("sum", "amount"), "transactions": ("count", "amount")},
+            max_rows_in_memory
+        ),
+        ["total_spend"], descending=True, max_rows_in_memory=max_rows_in_memory
+    )
+    return optimize(plan)
+
+
+def call_time_by_plan(users_store, calls_table, max_rows_in_memory=DEFAULT_MAX_ROWS):
+    """Total call duration per subscription plan (key-value users ⋈ column-store calls)"""
+    users = Scan(users_store, name="Users (key-value)")
+    calls = Scan(ColumnStore(calls_table), name="Calls (column store)")
+    plan = Aggregate(
+        SortMergeJoin(users, calls, "user_id", "user_id", max_rows_in_memory),
+        ["plan"],
+        {"total_duration": ("sum", "duration(sec)"), "calls": ("count", "duration(sec)")},
+        max_rows_in_memory
+    )
+    return optimize(plan)
@@ -0,0 +1,252 @@
+import sys
+import random
+import numpy as np
+import pandas as pd
+
+# ================= COMPACT UPI RECORDS =================
+# A plain dict per transaction repeats every key and keeps a full Python
+# object for every value. Below are two cheaper layouts:
+#   Transaction       -> one record, __slots__ (no per-instance __dict__)
+#   TransactionStore  -> many records, one NumPy array per column (struct-of-arrays)
+
+TXN_PREFIX = "UPI"
+TXN_FIELDS = ("txn_id", "amount", "city", "merchant", "payer")
+CODED_FIELDS = ("city", "merchant", "payer")
+
+CITIES = ["Pune", "Mumbai", "Delhi", "Chennai", "Bangalore"]
+MERCHANTS = ["Zomato", "Swiggy", "Amazon", "Paytm", "Myntra"]
+PAYERS = ["UserA", "UserB", "UserC", "UserD", "UserE"]
+
+
+def random_transaction():
+    """Same random UPI transaction the 💰 page streams, as a plain dict"""
+    return {
+        "txn_id": TXN_PREFIX + str(random.randint(10000, 99999)),
+        "amount": random.randint(100, 5000),
+        "city": random.choice(CITIES),
+        "merchant": random.choice(MERCHANTS),
+        "payer": random.choice(PAYERS)
+    }
+
+
+def parse_txn_id(txn_id):
+    """"UPI12345" -> 12345, refusing ids that would not round-trip through int32"""
+    digits = txn_id[len(TXN_PREFIX):] if isinstance(txn_id, str) and txn_id.startswith(TXN_PREFIX) else ""
+    if not (digits.isascii() and digits.isdigit()) or (len(digits) > 1 and digits[0] == "0"):
+        raise ValueError(f"txn_id must be '{TXN_PREFIX}' + digits without leading zeros, got {txn_id!r}")
+    value = int(digits)
+    if value > np.iinfo(np.int32).max:
+        raise ValueError(f"txn_id {txn_id!r} is too large for the int32 txn_id column")
+    return value
+
+
+def random_store(n, seed=None):
+    """n random transactions generated column-wise (fast path for big backfills)"""
+    rng = np.random.default_rng(seed)
+    return TransactionStore.from_arrays(
+        rng.integers(10000, 100000, n, dtype=np.int32),
+        rng.integers(100, 5001, n, dtype=np.int32),
+        city=pd.Categorical.from_codes(rng.integers(0, len(CITIES), n), categories=CITIES),
+        merchant=pd.Categorical.from_codes(rng.integers(0, len(MERCHANTS), n), categories=MERCHANTS),
+        payer=pd.Categorical.from_codes(rng.integers(0, len(PAYERS), n), categories=PAYERS)
+    )
+
+
+# ---------- SINGLE RECORD ----------
+class Transaction:
+    """One UPI transaction without a per-instance __dict__"""
+    __slots__ = TXN_FIELDS
+
+    def __init__(self, txn_id, amount, city, merchant, payer):
+        self.txn_id = txn_id
+        self.amount = int(amount)
+        self.city = sys.intern(city)
+        self.merchant = sys.intern(merchant)
+        self.payer = sys.intern(payer)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(*(d[f] for f in TXN_FIELDS))
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in TXN_FIELDS}
+
+    def __repr__(self):
+        return f"Transaction({self.txn_id}, ₹{self.amount}, {self.city}, {self.merchant}, {self.payer})"
+
+
+# ---------- DICTIONARY CODED COLUMN ----------
+class _CodedColumn:
+    """String column stored as small integer codes + one list of distinct values.
+
+    Codes start as int8 and are widened at the same category counts pandas uses,
+    so they always match the dtype pandas picks for Categorical codes (no copy).
+    """
+
+    def __init__(self, capacity):
+        self.codes = np.zeros(capacity, dtype=np.int8)
+        self.categories = []
+        self.lookup = {}
+
+    def encode(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            value = sys.intern(value)
+            self.categories.append(value)
+            self.lookup[value] = code
+            # pandas uses int8 codes below 127 categories, int16 below 32767
+            if len(self.categories) >= np.iinfo(self.codes.dtype).max:
+                wider = np.int16 if self.codes.dtype == np.int8 else np.int32
+                self.codes = self.codes.astype(wider)
+        return code
+
+    def resize(self, capacity):
+        grown = np.zeros(capacity, dtype=self.codes.dtype)
+        grown[:len(self.codes)] = self.codes
+        self.codes = grown
+
+    def view(self, n):
+        return pd.Categorical.from_codes(self.codes[:n], categories=self.categories, validate=False)
+
+
+# ---------- BULK STORAGE ----------
+class TransactionStore:
+    """Column-wise (struct-of-arrays) storage for many UPI transactions.
+
+    txn_id  -> int32 (numeric part of "UPI12345", checked by parse_txn_id)
+    amount  -> int32
+    city / merchant / payer -> dictionary-coded (see _CodedColumn)
+    """
+
+    def __init__(self, capacity=1024):
+        capacity = max(capacity, 1)
+        self._n = 0
+        self._txn_id = np.zeros(capacity, dtype=np.int32)
+        self._amount = np.zeros(capacity, dtype=np.int32)
+        self._coded = {f: _CodedColumn(capacity) for f in CODED_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, txn_id, amount, **coded):
+        """Bulk load whole columns at once (coded fields: strings or pd.Categorical)"""
+        n = len(amount)
+        store = cls(capacity=max(n, 1))
+        store._txn_id[:n] = txn_id
+        store._amount[:n] = amount
+        for f, col in store._coded.items():
+            cat = coded[f] if isinstance(coded[f], pd.Categorical) else pd.Categorical(coded[f])
+            col.categories = [sys.intern(str(c)) for c in cat.categories]
+            col.lookup = {c: i for i, c in enumerate(col.categories)}
+            col.codes = np.zeros(max(n, 1), dtype=cat.codes.dtype)
+            col.codes[:n] = cat.codes
+        store._n = n
+        return store
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self, needed):
+        capacity = len(self._amount)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_txn_id", "_amount"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+        for col in self._coded.values():
+            col.resize(capacity)
+
+    def append(self, txn):
+        """Store a transaction given as a dict or a Transaction"""
+        if isinstance(txn, Transaction):
+            txn = txn.to_dict()
+        txn_id = parse_txn_id(txn["txn_id"])
+        self._grow(self._n + 1)
+        i = self._n
+        self._txn_id[i] = txn_id
+        self._amount[i] = txn["amount"]
+        for f, col in self._coded.items():
+            col.codes[i] = col.encode(txn[f])
+        self._n += 1
+
+    def extend(self, txns):
+        for t in txns:
+            self.append(t)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("transaction index out of range")
+        coded = {f: col.categories[col.codes[i]] for f, col in self._coded.items()}
+        return Transaction(TXN_PREFIX + str(self._txn_id[i]), self._amount[i], **coded)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def column(self, name):
+        """Raw NumPy view of one column (codes for city/merchant/payer)"""
+        if name in self._coded:
+            return self._coded[name].codes[:self._n]
+        return getattr(self, "_" + name)[:self._n]
+
+    def categories(self, name):
+        return self._coded[name].categories
+
+    def to_frame(self):
+        """DataFrame whose columns are views over the stored arrays (no copy)"""
+        n = self._n
+        data = {
+            "txn_id": self._txn_id[:n],
+            "amount": self._amount[:n],
+        }
+        for f, col in self._coded.items():
+            data[f] = col.view(n)
+        return pd.DataFrame(data, columns=list(TXN_FIELDS), copy=False)
+
+    def nbytes(self):
+        """Bytes actually used by stored rows (excluding spare capacity)"""
+        n = self._n
+        used = self._txn_id[:n].nbytes + self._amount[:n].nbytes
+        for col in self._coded.values():
+            used += col.codes[:n].nbytes
+            used += sum(sys.getsizeof(c) for c in col.categories)
+        return used
+
+
+# ---------- MEMORY REPORT ----------
+def _deep_sizeof(obj, seen):
+    """sys.getsizeof that follows containers / slots; shared objects counted once"""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(v, seen) for v in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_sizeof(getattr(obj, s), seen) for s in obj.__slots__)
+    return size
+
+
+def memory_report(n=100000):
+    """Bytes per transaction for list-of-dicts vs list-of-Transaction vs TransactionStore"""
+    dicts = [random_transaction() for _ in range(n)]
+    slotted = [Transaction.from_dict(d) for d in dicts]
+    store = TransactionStore(capacity=n)
+    store.extend(dicts)
+
+    per_dict = _deep_sizeof(dicts, set()) / n
+    per_slot = _deep_sizeof(slotted, set()) / n
+    per_store = store.nbytes() / n
+
+    return pd.DataFrame({
+        "layout": ["list of dicts (before)", "list of __slots__ Transaction", "TransactionStore (columns)"],
+        "bytes_per_record": [round(per_dict, 1), round(per_slot, 1), round(per_store, 1)],
+        "reduction_vs_dicts": [1.0, round(per_dict / per_slot, 1), round(per_dict / per_store, 1)]
+    })
@@ -0,0 +1,239 @@
+import time
+import operator
+import numpy as np
+import pandas as pd
+
+# ================= DECLARATIVE UPI RULE ENGINE =================
+# Rules are plain data (dicts / JSON), so thresholds can be tuned without
+# touching code. Each rule is compiled once into a NumPy function and the
+# whole batch of transactions is scored in one pass.
+#
+# Rule kinds:
+#   "threshold"   -> flag a transaction when  field <op> value
+#       {"name", "kind": "threshold", "field", "op", "value", "reason"}
+#
+#   "group_count" -> flag a transaction when its group has >= min_count
+#                    matching transactions
+#       {"name", "kind": "group_count", "group_by": field or None,
+#        "min_count", "window": None or N, "where": optional threshold,
+#        "reason"}
+#       window=None counts over the whole batch; window=N counts only the
+#       last N transactions in stream order (transactions have no timestamp).
+
+OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+MAX_RULES = 64   # reasons are kept as one uint64 bitmask per transaction
+
+FRAUD_RULES = [
+    {
+        "name": "payer_burst",
+        "kind": "group_count",
+        "group_by": "payer",
+        "min_count": 3,
+        "window": None,
+        "reason": "Same user making too many payments quickly."
+    },
+    {
+        "name": "merchant_repeat",
+        "kind": "group_count",
+        "group_by": "merchant",
+        "min_count": 3,
+        "window": None,
+        "reason": "Suspicious transactions to same merchant repeatedly."
+    },
+    {
+        "name": "many_high_value",
+        "kind": "group_count",
+        "group_by": None,
+        "where": {"field": "amount", "op": ">", "value": 3000},
+        "min_count": 3,
+        "window": None,
+        "reason": "Multiple high value transactions detected."
+    }
+]
+
+CASHBACK_RULES = [
+    {
+        "name": "high_value_cashback",
+        "kind": "threshold",
+        "field": "amount",
+        "op": ">",
+        "value": 2000,
+        "reason": "High Value Transaction"
+    }
+]
+
+
+# ---------- COMPILATION ----------
+def compile_predicate(spec, categories):
+    """{"field", "op", "value"} -> fn(columns) -> bool array"""
+    field, value = spec["field"], spec["value"]
+    op = spec["op"]
+    if op == "in" and not isinstance(value, (list, tuple)):
+        raise TypeError(f"'in' on field '{field}' needs a list of values, got {value!r}")
+
+    if field in categories:
+        # compare dictionary codes instead of strings
+        cats = categories[field]
+        if op == "in":
+            codes = [cats.index(v) for v in value if v in cats]
+            return lambda cols: np.isin(cols[field], codes)
+        if op not in ("==", "!="):
+            raise ValueError(f"Rule on coded field '{field}' only supports ==, != and in")
+        code = cats.index(value) if value in cats else -1
+        fn = OPS[op]
+        return lambda cols: fn(cols[field], code)
+
+    if op == "in":
+        return lambda cols: np.isin(cols[field], value)
+    if op not in OPS:
+        raise ValueError(f"Unknown operator '{op}'")
+    fn = OPS[op]
+    return lambda cols: fn(cols[field], value)
+
+
+def _window_counts(codes, positions, n, window):
+    """Per row: how many rows of the same group fall in the last `window` positions"""
+    key = codes.astype(np.int64) * (n + 1) + positions
+    order = np.argsort(key, kind="stable")
+    sorted_key = key[order]
+    lower = codes.astype(np.int64) * (n + 1) + np.maximum(positions - window + 1, 0)
+    rank = np.empty(len(key), dtype=np.int64)
+    rank[order] = np.arange(len(key))
+    return rank - np.searchsorted(sorted_key, lower, side="left") + 1
+
+
+def _compile_group_count(rule, categories):
+    group_by = rule.get("group_by")
+    min_count = rule["min_count"]
+    window = rule.get("window")
+    where = compile_predicate(rule["where"], categories) if rule.get("where") else None
+    n_groups = len(categories[group_by]) if group_by in categories else None
+
+    def evaluate(cols):
+        n = len(cols["amount"])
+        mask = where(cols) if where else np.ones(n, dtype=bool)
+        idx = np.flatnonzero(mask)
+        if group_by is None:
+            codes = np.zeros(len(idx), dtype=np.int64)
+        elif n_groups is not None:
+            codes = cols[group_by][idx]
+        else:
+            codes = pd.factorize(cols[group_by][idx])[0]
+
+        if window is None:
+            counts = np.bincount(codes, minlength=n_groups or 1)[codes]
+        else:
+            counts = _window_counts(codes, idx, n, window)
+
+        hit = np.zeros(n, dtype=bool)
+        hit[idx[counts >= min_count]] = True
+        return hit
+
+    return evaluate
+
+
+def compile_rules(rules, categories):
+    """Turn rule dicts into NumPy functions; categories = {coded field: values}"""
+    if len(rules) > MAX_RULES:
+        raise ValueError(f"At most {MAX_RULES} rules per engine")
+    compiled = []
+    for rule in rules:
+        for required in ("name", "reason"):
+            if required not in rule:
+                raise KeyError(f"Rule is missing '{required}'")
+        kind = rule.get("kind", "threshold")
+        if kind == "threshold":
+            compiled.append(compile_predicate(rule, categories))
+        elif kind == "group_count":
+            compiled.append(_compile_group_count(rule, categories))
+        else:
+            raise ValueError(f"Unknown rule kind '{kind}' in rule '{rule.get('name')}'")
+    return compiled
+
+
+# ---------- RESULTS ----------
+class RuleResult:
+    """Per-transaction flags + bitmask of which rules fired"""
+
+    def __init__(self, rules, hits, seconds):
+        self.rules = rules
+        self.hits = hits                 # uint64, bit k set = rule k fired
+        self.flags = hits != 0
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.hits)
+
+    def reasons(self, i):
+        """Reasons for transaction i (negative indexes allowed)"""
+        h = int(self.hits[i])
+        return [r["reason"] for k, r in enumerate(self.rules) if h >> k & 1]
+
+    def fired_reasons(self):
+        """Reasons of every rule that fired on at least one transaction"""
+        any_hit = int(np.bitwise_or.reduce(self.hits)) if len(self.hits) else 0
+        return [r["reason"] for k, r in enumerate(self.rules) if any_hit >> k & 1]
+
+    def summary(self):
+        """Flagged transaction count per rule"""
+        return pd.DataFrame({
+            "rule": [r["name"] for r in self.rules],
+            "flagged": [int(np.count_nonzero(self.hits >> np.uint64(k) & np.uint64(1))) for k in range(len(self.rules))]
+        })
+
+    def throughput(self):
+        """Rules evaluated per second (rule x transaction checks / sec)"""
+        checks = len(self.rules) * len(self.hits)
+        per_sec = checks / self.seconds if self.seconds > 0 else float("inf")
+        return {
+            "transactions": len(self.hits),
+            "rules": len(self.rules),
+            "seconds": round(self.seconds, 4),
+            "rules_evaluated_per_sec": per_sec
+        }
+
+
+# ---------- ENGINE ----------
+class RuleEngine:
+    """Evaluates a list of rule dicts over a TransactionStore in one batched pass"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    def rows_needed(self):
+        """How many trailing transactions decide the latest one (None = all)"""
+        needed = 1
+        for rule in self.rules:
+            if rule.get("kind", "threshold") == "group_count":
+                if rule.get("window") is None:
+                    return None
+                needed = max(needed, rule["window"])
+        return needed
+
+    def evaluate_latest(self, store):
+        """Score only the tail the rules look at; result[-1] is the latest transaction"""
+        return self.evaluate(store, last=self.rows_needed())
+
+    def evaluate(self, store, last=None):
+        fields = ("amount", "city", "merchant", "payer")
+        start = 0 if last is None else max(len(store) - last, 0)
+        columns = {f: store.column(f)[start:] for f in fields}
+        categories = {f: store.categories(f) for f in ("city", "merchant", "payer")}
+        return self.evaluate_columns(columns, categories)
+
+    def evaluate_columns(self, columns, categories):
+        """columns: field -> NumPy array (codes for coded fields)"""
+        start = time.perf_counter()
+        compiled = compile_rules(self.rules, categories)
+        hits = np.zeros(len(columns["amount"]), dtype=np.uint64)
+        for k, fn in enumerate(compiled):
+            hits |= fn(columns).astype(np.uint64) << np.uint64(k)
+        return RuleResult(self.rules, hits, time.perf_counter() - start)